@@ -1,11 +1,10 @@
+import functools
 import pandas as pd
 from dts import config, logger
 from dts.datasets.utils import *
 from dts.utils.split import *
-from sklearn.preprocessing import StandardScaler, MinMaxScaler
-from datetime import datetime
+from sklearn.preprocessing import StandardScaler, MinMaxScaler, OneHotEncoder
 import requests, zipfile, io
-import warnings
 
 NAME = 'gefcom'
 SAMPLES_PER_DAY = 24
@@ -47,28 +46,64 @@ def process_csv():
     df.to_csv(os.path.join(config['data'], 'GEFCom2014/Load/gefcom2014.csv'), index=False)
 
 
+@functools.lru_cache(maxsize=1)
+def _default_hourly_index():
+    """
+    Hourly datetime index spanning the full GEFCom2014 load history.
+    Built once and reused across load_raw_dataset calls.
+    """
+    return pd.date_range('01-01-2001', '12-01-2011', freq=FREQ)[1:]
+
+
+def _read_csv(path, **kwargs):
+    """
+    Read one of the GEFCom CSV files using a float32 schema for the load and
+    temperature columns. The multi-threaded pyarrow engine is used when
+    pyarrow is installed, with the default engine as fallback.
+    :param path: path of the CSV file
+    :return: pandas.DataFrame
+    """
+    dtype = {TARGET: np.float32}
+    dtype.update({'w{}'.format(i): np.float32 for i in range(1, 26)})
+    try:
+        return pd.read_csv(path, engine='pyarrow', dtype=dtype, **kwargs)
+    except ImportError:
+        return pd.read_csv(path, dtype=dtype, **kwargs)
+
+
 def load_raw_dataset():
     """
     Load the dataset as is.
     :return: pandas.DataFrame: sorted dataframe with parsed datetime
     """
-    data_dir = os.path.join(config['data'], 'GEFCom2014/Load/Task 1/')
-    df = pd.read_csv(os.path.join(data_dir, 'L1-train.csv'))
-    for i in range(2, 16):
+    frames = []
+    for i in range(1, 16):
         data_dir = os.path.join(config['data'], 'GEFCom2014/Load/Task {}/'.format(i))
-        tmp = pd.read_csv(os.path.join(data_dir, 'L{}-train.csv'.format(i)))
-        df = pd.concat([df, tmp], axis=0)
-    df[DATETIME] = pd.date_range('01-01-2001', '12-01-2011', freq=FREQ)[1:]
-    df = df[~pd.isnull(df.LOAD)].reset_index(drop=True)
+        frames.append(_read_csv(os.path.join(data_dir, 'L{}-train.csv'.format(i))))
+    df = pd.concat(frames, axis=0, ignore_index=True)
+    df[DATETIME] = _default_hourly_index()
+    df.dropna(subset=[TARGET], inplace=True)
+    df.reset_index(drop=True, inplace=True)
     return df
 
 
 def load_dataset():
     """
-    Load an already cleaned version of the dataset
+    Load an already cleaned version of the dataset.
+    The parsed dataframe is cached to Parquet on first load: subsequent calls
+    read the cache, which stores datetime64 natively and skips the CSV parse.
     """
-    df = pd.read_csv(os.path.join(config['data'], 'GEFCom2014/Load/gefcom2014.csv'))
-    df[DATETIME] = df[DATETIME].apply(lambda x: datetime.strptime(x, '%Y-%m-%d %H:%M:%S'))
+    csv_path = os.path.join(config['data'], 'GEFCom2014/Load/gefcom2014.csv')
+    cache_path = os.path.join(config['data'], 'GEFCom2014/Load/gefcom2014.parquet')
+    if os.path.exists(cache_path) and \
+            (not os.path.exists(csv_path) or
+             os.path.getmtime(cache_path) >= os.path.getmtime(csv_path)):
+        return pd.read_parquet(cache_path)
+    df = _read_csv(csv_path, parse_dates=[DATETIME])
+    try:
+        df.to_parquet(cache_path, compression='zstd')
+    except ImportError:
+        logger.warn('No parquet engine available: the parsed dataset will not be cached.')
     return df
 
 
@@ -165,7 +200,7 @@ def load_data(fill_nan=None,
 
 
         X = df[TARGET].values[:-1] # load values
-        X = np.expand_dims(X, axis=-1)
+        X = np.ascontiguousarray(np.expand_dims(X, axis=-1), dtype=np.float32)
         if preprocessing:
             # init scaler using only information for training
             scaler, _ = transform(X[:train_len])
@@ -178,16 +213,27 @@ def load_data(fill_nan=None,
             X_temp, X_ex = add_exogenous_variables(df, one_hot=True)
             scaler_temp, _ = transform(X_temp[:train_len], scaler_type='minmax')
             _, X_temp = transform(X_temp, scaler_temp)
-            X = np.concatenate([X, X_temp, X_ex], axis=1)  # Load @ t-1, Datetime @ t, Temp @ t
+            # preallocate the final feature matrix and fill it slice by slice
+            # instead of concatenating into a fresh array
+            n_load = X.shape[1]
+            out = np.empty((X.shape[0], n_load + X_temp.shape[1] + X_ex.shape[1]), dtype=np.float32)
+            out[:, :n_load] = X
+            out[:, n_load:n_load + X_temp.shape[1]] = X_temp
+            out[:, n_load + X_temp.shape[1]:] = X_ex.toarray()
+            X = out  # Load @ t-1, Datetime @ t, Temp @ t
 
         if is_train:
             data = train_valid_split(X)
         else:
             data = train_test_split(X)
+        # hand contiguous float32 arrays to downstream consumers: split slices can
+        # be non C-contiguous, which forces silent copies in scalers and models
+        data = [np.ascontiguousarray(a, dtype=np.float32) if a is not None else None
+                for a in data]
 
         dataset['scaler'] = scaler
-        dataset['train'] = np.array(data[0], dtype=np.float32)
-        dataset['test'] = np.array(data[2], dtype=np.float32)
+        dataset['train'] = data[0]
+        dataset['test'] = data[2]
         return dataset
 
     else:
@@ -210,17 +256,21 @@ def add_exogenous_variables(df, one_hot=True):
     :param one_hot: if True, one hot encode all the features.
     :return: two matrix of exogenous features,
      the first for temperatures only the second one contains all the other variables.
+     When one_hot=True the second matrix is a scipy.sparse CSR matrix.
     """
     X_temp = df[['w{}'.format(i) for i in range(1, 26)]].values[1:]  # temperature values
-    df['year'] = df.datetime.map(lambda x: x.year)
-    df['month'] = df.datetime.map(lambda x: x.month)
-    df['day'] = df.datetime.map(lambda x: x.day)
-    df['hour'] = df.datetime.map(lambda x: x.hour)
-    df['holiday'] = [0] * len(df)
+    dt = df[DATETIME].dt
+    df['year'] = dt.year
+    df['month'] = dt.month
+    df['day'] = dt.day
+    df['hour'] = dt.hour
+    df['holiday'] = np.zeros(len(df), dtype=np.int8)
     df = _add_holidays(df)
     if one_hot:
-        ex_feat = pd.get_dummies(df, columns=['year', 'month', 'day', 'hour', 'holiday'])
-        return X_temp, ex_feat.values[:, -4 - (ex_feat.shape[1] - df.shape[1]):][1:]
+        # a CSR matrix instead of a dense dummy frame: one-hot features are >99% zeros
+        encoder = OneHotEncoder(sparse_output=True, dtype=np.float32)
+        ex_feat = encoder.fit_transform(df[['year', 'month', 'day', 'hour', 'holiday']].to_numpy())
+        return X_temp, ex_feat[1:]
     else:
         return X_temp, df.values
 
@@ -232,15 +282,14 @@ def _add_holidays(df):
     :param df: the datafrme
     :return: the agumented dtaframe
     """
-    with warnings.catch_warnings():
-        warnings.simplefilter("ignore")
-        idx = []
-        idx.extend(df[df.day == 1][df.month == 1].index.tolist())  # new year's eve
-        idx.extend(df[df.day == 4][df.month == 7].index.tolist())  # independence day
-        idx.extend(df[df.day == 11][df.month == 11].index.tolist())  # veternas day
-        idx.extend(df[df.day == 25][df.month == 12].index.tolist())  # christams
-        df.loc[idx, 'holiday'] = 1
-        return df
+    day = df['day'].to_numpy()
+    month = df['month'].to_numpy()
+    mask = ((day == 1) & (month == 1)) | \
+           ((day == 4) & (month == 7)) | \
+           ((day == 11) & (month == 11)) | \
+           ((day == 25) & (month == 12))  # new year's eve, independence day, veterans day, christmas
+    df.loc[mask, 'holiday'] = 1
+    return df
 
 
 def transform(X, scaler=None, scaler_type=None):
@@ -257,8 +306,14 @@ def transform(X, scaler=None, scaler_type=None):
             scaler = MinMaxScaler()
         else:
             scaler = StandardScaler()
-        scaler.fit(X)
-    return scaler, scaler.transform(X)
+        # fit and transform in a single pass over X
+        X_transformed = scaler.fit_transform(X)
+        # keep the fitted parameters in float32 so transforms never upcast to float64
+        for attr in ('scale_', 'mean_', 'min_', 'data_min_', 'data_max_', 'data_range_'):
+            if hasattr(scaler, attr):
+                setattr(scaler, attr, getattr(scaler, attr).astype(np.float32))
+        return scaler, X_transformed.astype(np.float32, copy=False)
+    return scaler, scaler.transform(X).astype(np.float32, copy=False)
 
 
 def inverse_transform(X, scaler, trend=None):
@@ -270,7 +325,7 @@ def inverse_transform(X, scaler, trend=None):
     :return:
         X with trend adds back and de-standardized
     """
-    X = X.astype(np.float32)
+    X = np.asarray(X, dtype=np.float32)  # no-op when X is already float32
     X = scaler.inverse_transform(X)
     try:
         X += trend
@@ -292,20 +347,12 @@ def apply_detrend(df, train_len):
         - the trend values that has to be added back after computing the prediction
     """
     # Compute mean values for each hour of every day of the week (STATS ARE COMPUTED USING ONLY TRAIN SET)
-    dt_idx = pd.DatetimeIndex(df[DATETIME])
-    df_copy = df.set_index(dt_idx, drop=False)
-    df_train_mean = \
-        df_copy.iloc[:train_len].groupby(
-            [df_copy.iloc[:train_len].index.hour])[TARGET].mean()
+    hours = df[DATETIME].dt.hour.to_numpy()
+    df_train_mean = df[TARGET].iloc[:train_len].groupby(hours[:train_len]).mean()
     # Remove mean values from dataset
-    df_copy['trend'] = None
-    for h in df_train_mean.index:
-            mu = df_train_mean[h]
-            idxs = df_copy.loc[(df_copy.index.hour == h)].index
-            df_copy.loc[idxs, TARGET] = df_copy.loc[idxs, TARGET].apply(lambda x: x - mu)
-            df_copy.loc[idxs, 'trend'] = mu
-    df[TARGET] = df_copy[TARGET].values
-    return df, np.float32(df_copy['trend'].values[:-1])
+    trend_values = df_train_mean.reindex(hours).to_numpy(dtype=np.float32)
+    df[TARGET] = df[TARGET].to_numpy(dtype=np.float32) - trend_values
+    return df, trend_values[:-1]
 
 
 